@@ -1,3 +1,7 @@
 class UnicornException(Exception):
     def __init__(self, name: str):
         self.name = name
+
+
+class InvalidCursorException(ValueError):
+    pass
@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+from bisect import bisect_right, insort
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from exceptions import InvalidCursorException
+
+
+class ItemStore:
+    """
+    In-memory item repository built once and shared by every request.
+
+    Items are kept by id for O(1) lookups, in insertion order for the default listing,
+    and in sorted secondary indexes for the fields given in `indexes`.
+    Pages are addressed with opaque cursors that encode the last key seen, so reading a
+    deep page costs the same as reading the first one.
+    """
+
+    def __init__(
+        self, items: Optional[Mapping[str, dict]] = None, indexes: Iterable[str] = ()
+    ):
+        self._items: Dict[str, dict] = {}
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._indexes: Dict[str, List[Tuple[Any, ...]]] = {
+            field: [] for field in indexes
+        }
+        for item_id, item in (items or {}).items():
+            self.put(item_id, item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def __getitem__(self, item_id: str) -> dict:
+        return self._items[item_id]
+
+    def get(self, item_id: str, default: Optional[dict] = None) -> Optional[dict]:
+        return self._items.get(item_id, default)
+
+    def put(self, item_id: str, item: dict):
+        if item_id in self._items:
+            self._unindex(item_id, self._items[item_id])
+        else:
+            self._positions[item_id] = len(self._ids)
+            self._ids.append(item_id)
+        self._items[item_id] = item
+        for field, index in self._indexes.items():
+            insort(index, _index_key(item.get(field), item_id))
+
+    def delete(self, item_id: str):
+        item = self._items.pop(item_id)
+        self._unindex(item_id, item)
+        self._ids.pop(self._positions.pop(item_id))
+        for position, moved_id in enumerate(self._ids):
+            self._positions[moved_id] = position
+
+    def page(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        skip: int = 0,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Return up to `limit` items following `cursor` and the cursor of the next page,
+        which is None once the listing is exhausted.
+        `skip` is only honoured without a cursor, to keep offset-based clients working.
+        """
+        start = max(skip, 0)
+        if order_by is None:
+            if cursor:
+                start = self._seek_position(cursor) + 1
+            page_ids = self._ids[start : start + limit]
+            has_more = start + limit < len(self._ids)
+        else:
+            if order_by not in self._indexes:
+                raise InvalidCursorException(f"Items are not indexed by {order_by!r}")
+            index = self._indexes[order_by]
+            if cursor:
+                start = bisect_right(index, self._seek_key(cursor, order_by))
+            page_ids = [key[-1] for key in index[start : start + limit]]
+            has_more = start + limit < len(index)
+
+        items = [self._items[item_id] for item_id in page_ids]
+        next_cursor = None
+        if has_more and page_ids:
+            next_cursor = self._encode_cursor(order_by, page_ids[-1])
+        return items, next_cursor
+
+    def _unindex(self, item_id: str, item: dict):
+        for field, index in self._indexes.items():
+            key = _index_key(item.get(field), item_id)
+            position = bisect_right(index, key) - 1
+            if position >= 0 and index[position] == key:
+                del index[position]
+
+    def _encode_cursor(self, order_by: Optional[str], item_id: str) -> str:
+        value = None if order_by is None else self._items[item_id].get(order_by)
+        raw = json.dumps([order_by, value, item_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Optional[str], Any, str]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            order_by, value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as error:
+            raise InvalidCursorException("Malformed cursor") from error
+        return order_by, value, item_id
+
+    def _seek_position(self, cursor: str) -> int:
+        order_by, _, item_id = self._decode_cursor(cursor)
+        if order_by is not None or item_id not in self._positions:
+            raise InvalidCursorException("Cursor does not belong to this listing")
+        return self._positions[item_id]
+
+    def _seek_key(self, cursor: str, order_by: str) -> Tuple[Any, ...]:
+        cursor_order_by, value, item_id = self._decode_cursor(cursor)
+        if cursor_order_by != order_by:
+            raise InvalidCursorException("Cursor does not belong to this listing")
+        return _index_key(value, item_id)
+
+
+def _index_key(value: Any, item_id: str) -> Tuple[Any, ...]:
+    # Missing values sort last and never get compared against real ones
+    return (value is None, value, item_id)
@@ -0,0 +1,166 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_MAX_FIELD_BYTES = int(os.environ.get("LOG_MAX_FIELD_BYTES", "1024"))
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class Truncated:
+    """
+    Log field wrapper deferring serialization and truncation of a possibly huge value,
+    such as a request body, to the listener thread.
+    """
+
+    __slots__ = ("value", "max_bytes")
+
+    def __init__(self, value: Any, max_bytes: Optional[int] = None):
+        self.value = value
+        self.max_bytes = max_bytes or LOG_MAX_FIELD_BYTES
+
+    def render(self) -> str:
+        if isinstance(self.value, bytes):
+            text = self.value[: self.max_bytes + 1].decode("utf-8", "replace")
+            size = len(self.value)
+        elif isinstance(self.value, str):
+            text = self.value[: self.max_bytes + 1]
+            size = len(self.value)
+        else:
+            text = orjson.dumps(self.value, default=str).decode()
+            size = len(text)
+        if size <= self.max_bytes:
+            return text
+        return f"{text[: self.max_bytes]}...[truncated {size - self.max_bytes} bytes]"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Truncated):
+        return obj.render()
+    return str(obj)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line with the timestamp, level, logger, message and every field
+    passed through `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=_default).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate limit repetitive records: per logger and message template, the first `burst`
+    records of every `interval` seconds go through, then only one in `sample_every`.
+    Records that go through carry how many were suppressed before them.
+    """
+
+    def __init__(
+        self, burst: int = 20, interval: float = 10.0, sample_every: int = 100
+    ):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        # (logger, template) -> [window start, seen in window, suppressed since last]
+        self._windows: Dict[Tuple[str, Any], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                window = self._windows[key] = [now, 0, suppressed]
+            window[1] += 1
+            seen = window[1]
+            if seen > self.burst and (seen - self.burst) % self.sample_every:
+                window[2] += 1
+                return False
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller: records are dropped, and counted, when
+    the listener falls behind and the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the listener thread, keep the record as it is
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def start_logging(level: str = LOG_LEVEL, stream=None):
+    """
+    Route the root logger through a bounded queue to a background thread writing JSON
+    lines, so that logging on the request path never waits on stdout.
+    """
+    global _listener, queue_handler  # pylint: disable=global-statement
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _listener = QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Flush the records still queued and detach the queue handler.
+    """
+    global _listener, queue_handler  # pylint: disable=global-statement
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(queue_handler)
+    _listener = queue_handler = None
@@ -1,10 +1,11 @@
-import time as t
+import logging
 from datetime import datetime, time, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 import uvicorn
 from fastapi import (
+    APIRouter,
     BackgroundTasks,
     Body,
     Cookie,
@@ -17,24 +18,35 @@ from fastapi import (
     Path,
     Query,
     Request,
+    Response,
     status,
     UploadFile,
 )
-from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-
-from exceptions import UnicornException
+from sqlalchemy.orm import Session
+
+from cache import MISSING, TTLCache
+from database import get_db, pool_metrics
+from exceptions import InvalidCursorException, UnicornException
+from item_store import ItemStore
+from logs import start_logging, stop_logging, Truncated
+from metrics import RequestMetrics, TimingMiddleware
 from models import (
     AuthUser,
     AuthUserInDB,
     CarItem,
     CommonQueryParams,
+    disable_auth_user,
     fake_decode_token,
     fake_hash_password,
+    fake_items_db,
     fake_save_user,
     fake_users_db,
+    get_sql_user,
+    get_sql_user_by_email,
+    get_users_after,
     Image,
     Item,
     ItemWithDatetime,
@@ -44,14 +56,44 @@ from models import (
     Offer,
     Pet,
     PlaneItem,
+    SQLUserOut,
     Tags,
     User,
     UserIn,
     UserOut,
 )
-from tasks import write_notification
+from ndjson import NDJSON_MEDIA_TYPE, ndjson_openapi, validate_ndjson
+from response_cache import CachedRoute, response_cache
+from responses import FastJSONResponse
+from serializers import CompiledResponseRoute
+from tasks import notification_writer
+from uploads import stream_files_to_disk
+
+logger = logging.getLogger(__name__)
+
+tutorial_app = FastAPI(default_response_class=FastJSONResponse)
+tutorial_app.router.route_class = CompiledResponseRoute
+
+request_metrics = RequestMetrics()
+request_metrics.register_collector(pool_metrics.prometheus_lines)
+tutorial_app.add_middleware(TimingMiddleware, metrics=request_metrics)
+
+item_store = ItemStore(fake_items_db, indexes=("name", "price"))
+
+# Read-only routes whose responses are cached with ETags, included at the end
+cached_router = APIRouter(route_class=CachedRoute)
 
-tutorial_app = FastAPI()
+
+@tutorial_app.on_event("startup")
+async def start_background_services():
+    start_logging()
+    await notification_writer.start()
+
+
+@tutorial_app.on_event("shutdown")
+async def stop_background_services():
+    await notification_writer.stop()
+    stop_logging()
 
 
 @tutorial_app.get("/")
@@ -76,6 +118,27 @@ def create_item(item: Item):
     return item
 
 
+@tutorial_app.post("/items/bulk", openapi_extra=ndjson_openapi(Item))
+async def create_items_bulk(request: Request):
+    """
+    Bulk import of items sent as NDJSON: every line is validated as it arrives and its
+    result streamed back, so the whole import never sits in memory.
+    """
+    return StreamingResponse(
+        validate_ndjson(request, Item), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@tutorial_app.post(
+    "/items_with_nested_model/bulk",
+    openapi_extra=ndjson_openapi(ItemWithNestedModel),
+)
+async def create_items_with_nested_model_bulk(request: Request):
+    return StreamingResponse(
+        validate_ndjson(request, ItemWithNestedModel), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
 @tutorial_app.post("/items/derived_attrs")
 def create_item_derived_attrs(item: Item):
     item_dict = item.dict()
@@ -90,20 +153,40 @@ def create_item_status_code(name: str):
     return {"name": name}
 
 
+def page_items(
+    skip: int, limit: int, cursor: Optional[str], order_by: Optional[str]
+) -> Tuple[List[dict], Optional[str]]:
+    try:
+        return item_store.page(limit=limit, cursor=cursor, order_by=order_by, skip=skip)
+    except InvalidCursorException as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
 @tutorial_app.get("/items/")
-def read_items(skip: int = 0, limit: int = 10):
-    fake_items_db = [{"item_name": "Foo"}, {"item_name": "Bar"}, {"item_name": "Baz"}]
-    return fake_items_db[skip : skip + limit]
+def read_items(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    order_by: Optional[str] = None,
+):
+    items, next_cursor = page_items(skip, limit, cursor, order_by)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [{"item_name": item["name"]} for item in items]
 
 
 @tutorial_app.get("/items_with_depends/")
 def read_items_with_depends(commons: CommonQueryParams = Depends()):
-    fake_items_db = [{"item_name": "Foo"}, {"item_name": "Bar"}, {"item_name": "Baz"}]
     response = {}
     if commons.q:
         response.update({"q": commons.q})
-    items = fake_items_db[commons.skip : commons.skip + commons.limit]
-    response.update({"items": items})
+    items, next_cursor = page_items(
+        commons.skip, commons.limit, commons.cursor, commons.order_by
+    )
+    response.update({"items": [{"item_name": item["name"]} for item in items]})
+    if next_cursor:
+        response.update({"next_cursor": next_cursor})
     return response
 
 
@@ -307,63 +390,35 @@ def read_items_with_duplicated_headers(x_token: Optional[List[str]] = Header(Non
     return {"X-Token values": x_token}
 
 
-@tutorial_app.get(
+@cached_router.get(
     "/items_response_model_exclude_unset/{item_id}",
     response_model=Item,
     response_model_exclude_unset=True,
 )
 def read_items_response_model_exclude_unset(item_id: str):
-    items = {
-        "foo": {"name": "Foo", "price": 50.2},
-        "bar": {
-            "name": "Bar",
-            "description": "The bartenders",
-            "price": 3.2,
-            "tax": 20.2,
-        },
-        "baz": {"name": "Baz", "description": None, "price": 4.2, "tax": 10.5},
-    }
-    return items[item_id]
+    return item_store[item_id]
 
 
-@tutorial_app.get(
+@cached_router.get(
     "/items/{item_id}/name",
     response_model=Item,
     response_model_include={"name"},
 )
 def read_item_name(item_id: str):
-    items = {
-        "foo": {"name": "Foo", "price": 50.2},
-        "bar": {
-            "name": "Bar",
-            "description": "The bartenders",
-            "price": 3.2,
-            "tax": 20.2,
-        },
-        "baz": {"name": "Baz", "description": None, "price": 4.2, "tax": 10.5},
-    }
-    return items[item_id]
+    return item_store[item_id]
 
 
-@tutorial_app.get(
+@cached_router.get(
     "/items/{item_id}/public", response_model=Item, response_model_exclude={"tax"}
 )
 def read_item_public_data(item_id: str):
-    items = {
-        "foo": {"name": "Foo", "price": 50.2},
-        "bar": {
-            "name": "Bar",
-            "description": "The bartenders",
-            "price": 3.2,
-            "tax": 20.2,
-        },
-        "baz": {"name": "Baz", "description": None, "price": 4.2, "tax": 10.5},
-    }
-    return items[item_id]
+    return item_store[item_id]
 
 
 @tutorial_app.put("/items/{item_id}")
 def update_item(item_id: int, item: Item):
+    item_store.put(str(item_id), item.dict(exclude_unset=True))
+    response_cache.invalidate(item_id=str(item_id))
     return {"item_id": item_id, **item.dict()}
 
 
@@ -490,7 +545,7 @@ def read_items_extra_datatypes(
     }
 
 
-@tutorial_app.get(
+@cached_router.get(
     "/items_planet_or_car/{item_id}", response_model=Union[PlaneItem, CarItem]
 )
 def read_item_planet_or_car(item_id: str):
@@ -549,6 +604,47 @@ def create_user_in_fake_db(user_in: UserIn):
     return user_saved
 
 
+@tutorial_app.get("/sql_users/", response_model=List[SQLUserOut])
+def read_sql_users(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, gt=0, le=1000),
+    db: Session = Depends(get_db),
+):
+    users, next_after_id = get_users_after(db, after_id=after_id, limit=limit)
+    if next_after_id is not None:
+        response.headers["X-Next-After-Id"] = str(next_after_id)
+    return users
+
+
+@tutorial_app.get("/sql_users/{user_id}", response_model=SQLUserOut)
+def read_sql_user(user_id: int, db: Session = Depends(get_db)):
+    user = get_sql_user(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@tutorial_app.get("/sql_users/by_email/{email}", response_model=SQLUserOut)
+def read_sql_user_by_email(email: str, db: Session = Depends(get_db)):
+    user = get_sql_user_by_email(db, email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@tutorial_app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(
+        request_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@tutorial_app.get("/db/pool_metrics")
+def read_db_pool_metrics():
+    return pool_metrics.snapshot()
+
+
 @tutorial_app.get("/models/{model_name}")
 def get_model(model_name: ModelName):
     if model_name == ModelName.ALEXNET:
@@ -560,9 +656,37 @@ def get_model(model_name: ModelName):
     return {"model_name": model_name, "message": "Have some residuals"}
 
 
-@tutorial_app.post("/file/")
-def create_file(file: bytes = File(...)):
-    return {"file_size": len(file)}
+def multipart_files_openapi(field_name: str, multiple: bool = False) -> dict:
+    """
+    Request body schema for routes that parse their multipart body themselves.
+    """
+    file_schema = {"type": "string", "format": "binary"}
+    if multiple:
+        file_schema = {"type": "array", "items": file_schema}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {field_name: file_schema},
+                        "required": [field_name],
+                    }
+                }
+            },
+        }
+    }
+
+
+@tutorial_app.post("/file/", openapi_extra=multipart_files_openapi("file"))
+async def create_file(request: Request):
+    """
+    The file is streamed to disk while being hashed instead of being read as `bytes`,
+    so memory use does not grow with the file size.
+    """
+    stored_file = (await stream_files_to_disk(request, "file"))[0]
+    return {"file_size": stored_file.size, "sha256": stored_file.sha256}
 
 
 @tutorial_app.post("/uploadfile/")
@@ -584,9 +708,15 @@ def create_upload_file(
     return {"filename": file.filename}
 
 
-@tutorial_app.post("/files/")
-def create_files(files: List[bytes] = File(..., description="Multiple files as bytes")):
-    return {"file_sizes": [len(file) for file in files]}
+@tutorial_app.post(
+    "/files/", openapi_extra=multipart_files_openapi("files", multiple=True)
+)
+async def create_files(request: Request):
+    stored_files = await stream_files_to_disk(request, "files")
+    return {
+        "file_sizes": [stored_file.size for stored_file in stored_files],
+        "sha256s": [stored_file.sha256 for stored_file in stored_files],
+    }
 
 
 @tutorial_app.post("/uploadfiles/")
@@ -618,12 +748,21 @@ def read_file(file_path: str):
 
 @tutorial_app.post("/offers/")
 def create_offer(offer: Offer):
-    return offer
+    # Returning the response directly skips the jsonable_encoder pass FastAPI would
+    # otherwise run on the whole offer before rendering it
+    return FastJSONResponse(offer)
+
+
+@tutorial_app.post("/offers/bulk", openapi_extra=ndjson_openapi(Offer))
+async def create_offers_bulk(request: Request):
+    return StreamingResponse(
+        validate_ndjson(request, Offer), media_type=NDJSON_MEDIA_TYPE
+    )
 
 
 @tutorial_app.post("/images/multiple/")
 def create_multiple_images(images: List[Image]):
-    return images
+    return FastJSONResponse(images)
 
 
 @tutorial_app.post("/index-weights/")
@@ -685,15 +824,16 @@ def read_pets():
 @tutorial_app.put("/item_with_datetime/{id}")
 def update_item_with_datetime(id: str, item_with_datetime: ItemWithDatetime):
     fake_db = {}
-    json_compatible_item_data = jsonable_encoder(item_with_datetime)
-    fake_db[id] = json_compatible_item_data
-    return json_compatible_item_data
+    fake_db[id] = item_with_datetime
+    return item_with_datetime
 
 
 @tutorial_app.exception_handler(UnicornException)
 def unicorn_exception_handler(request: Request, exc: UnicornException):
-    print(request, exc)
-    return JSONResponse(
+    logger.warning(
+        "Unicorn exception", extra={"path": request.url.path, "unicorn": exc.name}
+    )
+    return FastJSONResponse(
         status_code=status.HTTP_418_IM_A_TEAPOT,
         content={"message": f"Oops! {exc.name} did something. There goes a rainbow..."},
     )
@@ -711,18 +851,34 @@ def validation_exception_handler(request: Request, exc: RequestValidationError):
     """
     Override request validation exceptions to include what was sent as "body"
     """
-    print(request, exc)
-    return JSONResponse(
+    errors = exc.errors()
+    logger.warning(
+        "Request validation failed",
+        extra={
+            "path": request.url.path,
+            "errors": Truncated(errors),
+            "body": Truncated(exc.body),
+        },
+    )
+    return FastJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=jsonable_encoder({"detail": exc.errors(), "body": exc.body}),
+        content={"detail": errors, "body": exc.body},
     )
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+# Resolved users by token; invalid tokens are cached as None for a shorter time
+identity_cache = TTLCache(maxsize=10_000, ttl=300)
+INVALID_TOKEN_TTL = 30
+
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
-    user = fake_decode_token(token)
+    user = identity_cache.get(token)
+    if user is MISSING:
+        user = fake_decode_token(token)
+        identity_cache.set(token, user, ttl=None if user else INVALID_TOKEN_TTL)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -738,6 +894,13 @@ def get_current_active_user(current_user: AuthUser = Depends(get_current_user)):
     return current_user
 
 
+def disable_user(username: str):
+    disable_auth_user(fake_users_db, username)
+    identity_cache.discard_where(
+        lambda _, user: user is not None and user.username == username
+    )
+
+
 @tutorial_app.post("/token")
 def token(form_data: OAuth2PasswordRequestForm = Depends()):
     user_dict = fake_users_db.get(form_data.username)
@@ -756,24 +919,16 @@ def read_current_user(current_user: AuthUser = Depends(get_current_active_user))
     return current_user
 
 
-@tutorial_app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """
-    A "middleware" is a function that works with every request before it is processed by any specific path operation.
-     And also with every response before returning it.
-    """
-    start_time = t.time()
-    response = await call_next(request)
-    process_time = t.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-
 @tutorial_app.post("/send-notification/{email}")
 def send_notification(email: str, background_tasks: BackgroundTasks):
-    background_tasks.add_task(write_notification, email, message="some notification")
+    background_tasks.add_task(
+        notification_writer.write, email, message="some notification"
+    )
     return {"message": "Notification sent in the background"}
 
 
+tutorial_app.include_router(cached_router)
+
+
 if __name__ == "__main__":
     uvicorn.run(tutorial_app, host="0.0.0.0", port=8000)
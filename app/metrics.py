@@ -0,0 +1,174 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+UNMATCHED_ROUTE = "<unmatched>"
+
+Collector = Callable[[], List[str]]
+
+
+class LatencyHistogram:
+    """
+    Fixed-size latency histogram: one counter per bucket plus the running sum and count.
+    """
+
+    __slots__ = ("counts", "sum_ns", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum_ns = 0
+        self.count = 0
+
+
+class RequestMetrics:
+    """
+    Per route template latency histograms and status code counters.
+
+    Observations are only made from the event loop thread, so plain integer counters
+    in preallocated lists are enough and no lock is taken on the request path.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._bounds_ns = [int(bound * 1e9) for bound in buckets]
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.statuses: Dict[Tuple[str, str, int], int] = {}
+        self._collectors: List[Collector] = []
+
+    def observe(self, method: str, route: str, status_code: int, elapsed_ns: int):
+        key = (method, route)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(len(self.buckets) + 1)
+        histogram.counts[bisect_left(self._bounds_ns, elapsed_ns)] += 1
+        histogram.sum_ns += elapsed_ns
+        histogram.count += 1
+        status_key = (method, route, status_code)
+        self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def register_collector(self, collector: Collector):
+        """
+        Add a function returning extra Prometheus exposition lines for `/metrics`.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.histograms.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+                f"{histogram.count}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum_ns / 1e9}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {histogram.count}"
+            )
+        lines += [
+            "# HELP http_requests_total Requests by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in sorted(self.statuses.items()):
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                f'status="{status_code}"}} {count}'
+            )
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request with a monotonic nanosecond clock.
+
+    The time until the response starts is sent in the `X-Process-Time` header (in
+    seconds) and the time until the response ends is recorded in `metrics` under the
+    route template, so that `/items/1` and `/items/2` share a histogram.
+    Response bodies are passed through untouched, which keeps streaming responses
+    streaming.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+        self._templates: Dict[Callable, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_process_time(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", []))
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "X-Process-Time", str((time.perf_counter_ns() - start) / 1e9)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_process_time)
+        finally:
+            self.metrics.observe(
+                scope["method"],
+                self._route_template(scope),
+                status_code,
+                time.perf_counter_ns() - start,
+            )
+
+    def _route_template(self, scope: Scope) -> str:
+        # The router leaves the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(endpoint)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            self._templates[endpoint] = template
+        return template
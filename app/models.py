@@ -1,13 +1,16 @@
+import logging
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from pydantic import BaseModel, Field, HttpUrl
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, select, String
 from sqlalchemy.orm import Session
 
 from database import Base
 
+logger = logging.getLogger(__name__)
+
 
 class ModelName(str, Enum):
     ALEXNET = "alexnet"
@@ -82,7 +85,7 @@ def fake_password_hasher(raw_password: str):
 def fake_save_user(user_in: UserIn):
     hashed_password = fake_password_hasher(user_in.password)
     user_in_db = UserInDB(**user_in.dict(), hashed_password=hashed_password)
-    print(f"User saved with hashed_password pwd: {hashed_password} ...not really")
+    logger.info("User saved ...not really", extra={"username": user_in.username})
     return user_in_db
 
 
@@ -116,11 +119,40 @@ class ItemWithDatetime(BaseModel):
     description: Optional[str] = None
 
 
+class StoredFile(BaseModel):
+    field_name: str
+    filename: str
+    size: int
+    sha256: str
+    path: str
+
+
 class CommonQueryParams:
-    def __init__(self, q: Optional[str] = None, skip: int = 0, limit: int = 100):
+    def __init__(
+        self,
+        q: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+    ):
         self.q = q
         self.skip = skip
         self.limit = limit
+        self.cursor = cursor
+        self.order_by = order_by
+
+
+fake_items_db = {
+    "foo": {"name": "Foo", "price": 50.2},
+    "bar": {
+        "name": "Bar",
+        "description": "The bartenders",
+        "price": 3.2,
+        "tax": 20.2,
+    },
+    "baz": {"name": "Baz", "description": None, "price": 4.2, "tax": 10.5},
+}
 
 
 fake_users_db = {
@@ -162,6 +194,10 @@ def get_user(db, username: str):
         return AuthUserInDB(**user_dict)
 
 
+def disable_auth_user(db, username: str):
+    db[username]["disabled"] = True
+
+
 def fake_decode_token(token):
     # This doesn't provide any security at all
     # Check the next version
@@ -177,6 +213,14 @@ class SQLUser(Base):
     hashed_password = Column(String)
 
 
+class SQLUserOut(BaseModel):
+    id: int
+    email: str
+
+    class Config:
+        orm_mode = True
+
+
 def get_sql_user(db: Session, user_id: int):
     return db.query(SQLUser).filter(SQLUser.id == user_id).first()
 
@@ -187,3 +231,29 @@ def get_sql_user_by_email(db: Session, email: str):
 
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(SQLUser).offset(skip).limit(limit).all()
+
+
+def get_users_after(
+    db: Session, after_id: Optional[int] = None, limit: int = 100
+) -> Tuple[List[SQLUser], Optional[int]]:
+    """
+    Keyset (seek) pagination over the indexed primary key: the database jumps straight
+    to `after_id` instead of scanning and discarding `skip` rows, so every page costs
+    the same. Returns the page and the `after_id` to ask for the next one, if any.
+    """
+    query = db.query(SQLUser)
+    if after_id is not None:
+        query = query.filter(SQLUser.id > after_id)
+    users = query.order_by(SQLUser.id).limit(limit).all()
+    next_after_id = users[-1].id if len(users) == limit else None
+    return users, next_after_id
+
+
+async def get_sql_user_async(db, user_id: int):
+    result = await db.execute(select(SQLUser).where(SQLUser.id == user_id))
+    return result.scalars().first()
+
+
+async def get_sql_user_by_email_async(db, email: str):
+    result = await db.execute(select(SQLUser).where(SQLUser.email == email))
+    return result.scalars().first()
@@ -0,0 +1,102 @@
+from typing import AsyncIterator, Iterator, Tuple, Type
+
+import orjson
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_MAX_LINE_BYTES = 1024 * 1024
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = NDJSON_MAX_LINE_BYTES
+) -> AsyncIterator[Tuple[int, bytes, bool]]:
+    """
+    Split a byte stream into numbered lines as it arrives, yielding
+    `(line number, line, too long)` for every non-blank line.
+
+    At most `max_line_bytes` are buffered: the rest of a longer line is skipped and it
+    is reported as too long, so memory use does not depend on the input.
+    """
+    buffer = b""
+    number = 0
+    too_long = False
+    async for chunk in chunks:
+        start = 0
+        end = chunk.find(b"\n")
+        while end != -1:
+            number += 1
+            line = b"" if too_long else buffer + chunk[start:end]
+            if too_long or len(line) > max_line_bytes:
+                yield number, b"", True
+            elif line.strip():
+                yield number, line, False
+            buffer, too_long = b"", False
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if not too_long:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                buffer, too_long = b"", True
+    if too_long:
+        yield number + 1, b"", True
+    elif buffer.strip():
+        yield number + 1, buffer, False
+
+
+def _validate_line(model: Type[BaseModel], line: bytes) -> dict:
+    try:
+        model.parse_obj(orjson.loads(line))
+    except orjson.JSONDecodeError as error:
+        return {"status": "error", "errors": [{"msg": str(error)}]}
+    except ValidationError as error:
+        return {"status": "error", "errors": error.errors()}
+    return {"status": "ok"}
+
+
+def _dump_lines(results: Iterator[dict]) -> bytes:
+    return b"".join(orjson.dumps(result) + b"\n" for result in results)
+
+
+async def validate_ndjson(
+    request: Request, model: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Validate every line of an NDJSON request body against `model` while it streams in,
+    streaming back one result line per input line and a final summary line.
+    Results are sent in batches of up to 1000 lines rather than one by one.
+    """
+    counts = {"ok": 0, "error": 0}
+    results = []
+    async for number, line, too_long in iter_lines(request.stream()):
+        if too_long:
+            result = {
+                "status": "error",
+                "errors": [{"msg": f"line exceeds {NDJSON_MAX_LINE_BYTES} bytes"}],
+            }
+        else:
+            result = _validate_line(model, line)
+        counts[result["status"]] += 1
+        results.append({"line": number, **result})
+        if len(results) >= 1000:
+            yield _dump_lines(results)
+            results.clear()
+    results.append({"summary": counts})
+    yield _dump_lines(results)
+
+
+def ndjson_openapi(model: Type[BaseModel]) -> dict:
+    schema = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "description": f"One {model.__name__} JSON object per line",
+            "content": {NDJSON_MEDIA_TYPE: {"schema": schema}},
+        },
+        "responses": {
+            "200": {
+                "description": "One validation result per line, then a summary",
+                "content": {NDJSON_MEDIA_TYPE: {}},
+            }
+        },
+    }
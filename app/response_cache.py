@@ -0,0 +1,92 @@
+import hashlib
+from typing import Callable, Coroutine, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from cache import MISSING, TTLCache
+from serializers import CompiledResponseRoute
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+    etag: str
+    path_params: Dict[str, str]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class ResponseCache(TTLCache):
+    """
+    Successful GET responses keyed on the request path and the query params the route
+    declares, stored with a strong ETag computed from the body.
+    """
+
+    def invalidate(self, **path_params: str) -> int:
+        """
+        Drop the cached responses of every route called with these path params, e.g.
+        `invalidate(item_id="foo")` after item "foo" changed.
+        """
+        return self.discard_where(
+            lambda _, cached: all(
+                cached.path_params.get(name) == value
+                for name, value in path_params.items()
+            )
+        )
+
+
+response_cache = ResponseCache(maxsize=1024, ttl=60)
+
+
+class CachedRoute(CompiledResponseRoute):
+    """
+    Route class for read-only path operations whose response only depends on the path
+    and the declared query params. Conditional requests matching the cached ETag are
+    answered with a 304 without calling the path operation.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine]:
+        route_handler = super().get_route_handler()
+        query_names = sorted(param.alias for param in self.dependant.query_params)
+
+        async def cached_route_handler(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD"):
+                return await route_handler(request)
+
+            key = (
+                request.url.path,
+                tuple(
+                    (name, tuple(request.query_params.getlist(name)))
+                    for name in query_names
+                ),
+            )
+            cached = response_cache.get(key)
+            if cached is MISSING:
+                response = await route_handler(request)
+                if response.status_code != 200:
+                    return response
+                etag = f'"{hashlib.sha256(response.body).hexdigest()}"'
+                headers = {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name != "content-length"
+                }
+                headers["etag"] = etag
+                cached = CachedResponse(
+                    response.body, headers, etag, dict(request.path_params)
+                )
+                response_cache.set(key, cached)
+
+            if etag_matches(request.headers.get("if-none-match"), cached.etag):
+                return Response(status_code=304, headers={"etag": cached.etag})
+            return Response(content=cached.body, headers=cached.headers)
+
+        return cached_route_handler
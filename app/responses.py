@@ -0,0 +1,26 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # Only reached for types orjson does not know
+    if isinstance(obj, BaseModel):
+        return obj.dict(by_alias=True)
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed JSON response. datetimes, UUIDs, dataclasses and non-str dict keys
+    are serialized natively and pydantic models through `.dict()`, so content does not
+    need a `jsonable_encoder` pass first.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,185 @@
+import asyncio
+import functools
+from copy import copy
+from typing import Any, Callable, Coroutine, List, Optional, Type
+
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute, get_request_handler
+from pydantic import BaseModel
+from pydantic.fields import ModelField, SHAPE_SINGLETON
+
+from responses import FastJSONResponse
+
+Serializer = Callable[[Any], Any]
+
+
+def _is_flat(field: ModelField) -> bool:
+    # Values of flat fields can be handed to the response class as they are
+    return (
+        field.shape == SHAPE_SINGLETON
+        and not field.sub_fields
+        and not (isinstance(field.type_, type) and issubclass(field.type_, BaseModel))
+    )
+
+
+def compile_serializer(
+    model: Any,
+    include: Optional[set] = None,
+    exclude: Optional[set] = None,
+    by_alias: bool = True,
+    exclude_unset: bool = False,
+    exclude_defaults: bool = False,
+    exclude_none: bool = False,
+) -> Optional[Serializer]:
+    """
+    Build a function turning what a path operation returns into the content of its
+    response, for one response model and one set of include/exclude options.
+
+    Instances of the model are trusted as they are, anything else is validated into it.
+    Fields kept after include/exclude are resolved once here; models whose kept fields
+    are all flat are then serialized by reading those attributes directly.
+    Returns None for response models it does not handle, like unions or nested
+    include/exclude dicts, so that callers can fall back to FastAPI's serialization.
+    """
+    if getattr(model, "__origin__", None) in (list, List):
+        item_serializer = compile_serializer(
+            model.__args__[0],
+            include,
+            exclude,
+            by_alias,
+            exclude_unset,
+            exclude_defaults,
+            exclude_none,
+        )
+        if item_serializer is None:
+            return None
+        return lambda content: [item_serializer(item) for item in content]
+
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        return None
+    if isinstance(include, dict) or isinstance(exclude, dict):
+        return None
+
+    fields = [
+        field
+        for name, field in model.__fields__.items()
+        if (include is None or name in include)
+        and (exclude is None or name not in exclude)
+    ]
+
+    def validate(content: Any) -> BaseModel:
+        if isinstance(content, model):
+            return content
+        if isinstance(content, BaseModel):
+            content = content.dict(by_alias=True, exclude_unset=exclude_unset)
+        return model.validate(content)
+
+    if not all(_is_flat(field) for field in fields):
+        kept_names = {field.name for field in fields}
+
+        def serialize_nested(content: Any) -> dict:
+            return validate(content).dict(
+                include=kept_names,
+                by_alias=by_alias,
+                exclude_unset=exclude_unset,
+                exclude_defaults=exclude_defaults,
+                exclude_none=exclude_none,
+            )
+
+        return serialize_nested
+
+    keys = [
+        (field.name, field.alias if by_alias else field.name, field.default)
+        for field in fields
+    ]
+
+    def serialize_flat(content: Any) -> dict:
+        instance = validate(content)
+        values = instance.__dict__
+        fields_set = instance.__fields_set__
+        data = {}
+        for name, key, default in keys:
+            value = values[name]
+            if exclude_unset and name not in fields_set:
+                continue
+            if exclude_none and value is None:
+                continue
+            if exclude_defaults and value == default:
+                continue
+            data[key] = value
+        return data
+
+    return serialize_flat
+
+
+def _uses_response_param(dependant: Dependant) -> bool:
+    return dependant.response_param_name is not None or any(
+        _uses_response_param(sub_dependant) for sub_dependant in dependant.dependencies
+    )
+
+
+class CompiledResponseRoute(APIRoute):
+    """
+    Route class compiling the route's response model serializer once, at registration,
+    instead of having FastAPI validate and `jsonable_encoder` every response.
+
+    Routes keep FastAPI's own serialization when the serializer cannot be compiled,
+    when they do not render through FastJSONResponse, or when they take a `Response`
+    parameter whose headers would be lost.
+    """
+
+    def get_route_handler(self) -> Callable[[Any], Coroutine[Any, Any, Response]]:
+        response_class: Type[Response] = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        serializer = None
+        if (
+            self.response_model is not None
+            and issubclass(response_class, FastJSONResponse)
+            and not _uses_response_param(self.dependant)
+        ):
+            serializer = compile_serializer(
+                self.response_model,
+                include=self.response_model_include,
+                exclude=self.response_model_exclude,
+                by_alias=self.response_model_by_alias,
+                exclude_unset=self.response_model_exclude_unset,
+                exclude_defaults=self.response_model_exclude_defaults,
+                exclude_none=self.response_model_exclude_none,
+            )
+        if serializer is None:
+            return super().get_route_handler()
+
+        response_args = {}
+        if self.status_code is not None:
+            response_args["status_code"] = self.status_code
+
+        def render(content: Any) -> Response:
+            if isinstance(content, Response):
+                return content
+            return response_class(serializer(content), **response_args)
+
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def serialized_endpoint(*args, **kwargs):
+                return render(await endpoint(*args, **kwargs))
+
+        else:
+
+            @functools.wraps(endpoint)
+            def serialized_endpoint(*args, **kwargs):
+                return render(endpoint(*args, **kwargs))
+
+        dependant = copy(self.dependant)
+        dependant.call = serialized_endpoint
+        return get_request_handler(
+            dependant=dependant,
+            body_field=self.body_field,
+            status_code=self.status_code,
+            response_class=self.response_class,
+            dependency_overrides_provider=self.dependency_overrides_provider,
+        )
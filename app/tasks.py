@@ -1,4 +1,115 @@
-def write_notification(email: str, message=""):
-    with open("log.txt", mode="w") as email_file:
-        content = f"notification for {email}: {message}"
-        email_file.write(content)
+import asyncio
+from typing import List, Optional
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+_STOP = object()
+
+
+class NotificationWriter:
+    """
+    Append-only notification sink: producers put lines on a bounded queue and a single
+    writer task flushes them to `path` in batches, once `batch_size` lines are waiting
+    or `flush_interval` seconds after the first one arrived.
+
+    When the queue is full, "block" makes producers wait (backpressure), "drop_newest"
+    discards the incoming line and "drop_oldest" evicts the oldest queued one.
+    """
+
+    def __init__(
+        self,
+        path: str = "log.txt",
+        max_queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: str = "block",
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.path = path
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.written = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._file = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._batch_ready = asyncio.Event()
+        self._file = open(self.path, mode="a")  # pylint: disable=consider-using-with
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """
+        Flush everything already queued, then close the file.
+        """
+        if not self.running:
+            return
+        self._stopping = True
+        await self._queue.put(_STOP)
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def write(self, email: str, message: str = ""):
+        if not self.running:
+            await self.start()
+        line = f"notification for {email}: {message}\n"
+        if self._queue.full():
+            if self.overflow == "drop_newest":
+                self.dropped += 1
+                return
+            if self.overflow == "drop_oldest":
+                self._queue.get_nowait()
+                self.dropped += 1
+        await self._queue.put(line)
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        try:
+            stopping = False
+            while not stopping:
+                first = await self._queue.get()
+                if first is _STOP:
+                    break
+                if not self._stopping and self._queue.qsize() + 1 < self.batch_size:
+                    self._batch_ready.clear()
+                    try:
+                        await asyncio.wait_for(
+                            self._batch_ready.wait(), self.flush_interval
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                batch = [first]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    line = self._queue.get_nowait()
+                    if line is _STOP:
+                        stopping = True
+                        break
+                    batch.append(line)
+                await loop.run_in_executor(None, self._write_lines, batch)
+        finally:
+            self._file.close()
+
+    def _write_lines(self, lines: List[str]):
+        self._file.write("".join(lines))
+        self._file.flush()
+        self.written += len(lines)
+
+
+notification_writer = NotificationWriter()
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, status
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from models import StoredFile
+
+UPLOAD_DIR = os.environ.get(
+    "UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "fastapi-tutorial-uploads")
+)
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get("UPLOAD_MAX_FILE_SIZE", 100 * 1024**2))
+UPLOAD_MAX_REQUEST_SIZE = int(os.environ.get("UPLOAD_MAX_REQUEST_SIZE", 1024**3))
+
+
+def _payload_too_large(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail
+    )
+
+
+class _OpenFile:
+    def __init__(self, field_name: str, filename: str, target_dir: str):
+        self.field_name = field_name
+        self.filename = filename
+        self.path = os.path.join(target_dir, uuid.uuid4().hex)
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.file = open(self.path, mode="wb")  # pylint: disable=consider-using-with
+
+    def stored(self) -> StoredFile:
+        return StoredFile(
+            field_name=self.field_name,
+            filename=self.filename,
+            size=self.size,
+            sha256=self.sha256.hexdigest(),
+            path=self.path,
+        )
+
+
+async def stream_files_to_disk(
+    request: Request,
+    field_name: str,
+    target_dir: Optional[str] = None,
+    max_file_size: Optional[int] = None,
+    max_request_size: Optional[int] = None,
+) -> List[StoredFile]:
+    """
+    Parse a multipart body chunk by chunk as it arrives, writing the files sent as
+    `field_name` straight to `target_dir` while hashing and counting their bytes.
+
+    Nothing but the current chunk is held in memory, and the request is rejected with a
+    413 as soon as the Content-Length or the bytes received so far go over the limits.
+    Files already written are removed when the upload fails.
+    """
+    target_dir = target_dir or UPLOAD_DIR
+    max_file_size = max_file_size or UPLOAD_MAX_FILE_SIZE
+    max_request_size = max_request_size or UPLOAD_MAX_REQUEST_SIZE
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > max_request_size:
+        raise _payload_too_large(f"Request body exceeds {max_request_size} bytes")
+
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data body",
+        )
+
+    os.makedirs(target_dir, exist_ok=True)
+    events = []
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": lambda: events.append(("part_begin", b"")),
+            "on_header_field": lambda data, start, end: events.append(
+                ("header_field", data[start:end])
+            ),
+            "on_header_value": lambda data, start, end: events.append(
+                ("header_value", data[start:end])
+            ),
+            "on_header_end": lambda: events.append(("header_end", b"")),
+            "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+            "on_part_data": lambda data, start, end: events.append(
+                ("part_data", data[start:end])
+            ),
+            "on_part_end": lambda: events.append(("part_end", b"")),
+        },
+    )
+
+    stored: List[StoredFile] = []
+    current: Optional[_OpenFile] = None
+    header_field = header_value = content_disposition = b""
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_request_size:
+                raise _payload_too_large(
+                    f"Request body exceeds {max_request_size} bytes"
+                )
+            parser.write(chunk)
+            for event, data in events:
+                if event == "part_begin":
+                    content_disposition = b""
+                elif event == "header_field":
+                    header_field += data
+                elif event == "header_value":
+                    header_value += data
+                elif event == "header_end":
+                    if header_field.lower() == b"content-disposition":
+                        content_disposition = header_value
+                    header_field = header_value = b""
+                elif event == "headers_finished":
+                    _, options = parse_options_header(content_disposition)
+                    name = options.get(b"name", b"").decode("latin-1")
+                    if name == field_name and b"filename" in options:
+                        filename = options[b"filename"].decode("utf-8", "replace")
+                        current = _OpenFile(name, filename, target_dir)
+                elif event == "part_data" and current is not None:
+                    current.size += len(data)
+                    if current.size > max_file_size:
+                        raise _payload_too_large(
+                            f"File {current.filename!r} exceeds {max_file_size} bytes"
+                        )
+                    current.sha256.update(data)
+                    await run_in_threadpool(current.file.write, data)
+                elif event == "part_end" and current is not None:
+                    current.file.close()
+                    stored.append(current.stored())
+                    current = None
+            events.clear()
+        parser.finalize()
+    except BaseException:
+        if current is not None:
+            current.file.close()
+            os.remove(current.path)
+        for stored_file in stored:
+            os.remove(stored_file.path)
+        raise
+
+    if not stored:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[
+                {
+                    "loc": ["body", field_name],
+                    "msg": "field required",
+                    "type": "value_error.missing",
+                }
+            ],
+        )
+    return stored
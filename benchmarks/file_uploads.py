@@ -0,0 +1,96 @@
+"""
+Upload files of growing size to /file/ through the ASGI interface and report the
+peak RSS of the process, which should stay flat for the streaming upload path.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/file_uploads.py
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+import uploads
+from main import tutorial_app
+
+BOUNDARY = b"benchmarkboundary"
+CHUNK = b"x" * 64 * 1024
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def upload(size: int):
+    head = (
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+        b"Content-Type: application/octet-stream\r\n\r\n"
+    )
+    tail = b"\r\n--" + BOUNDARY + b"--\r\n"
+    chunks = [head] + [CHUNK] * (size // len(CHUNK)) + [tail]
+    content_length = sum(len(chunk) for chunk in chunks)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/file/",
+        "raw_path": b"/file/",
+        "query_string": b"",
+        "root_path": "",
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+        "headers": [
+            (b"content-type", b"multipart/form-data; boundary=" + BOUNDARY),
+            (b"content-length", str(content_length).encode()),
+        ],
+    }
+    messages = iter(
+        [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+        + [{"type": "http.request", "body": b"", "more_body": False}]
+    )
+    response_complete = asyncio.Event()
+
+    async def receive():
+        message = next(messages, None)
+        if message is None:
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+        return message
+
+    statuses = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        elif not message.get("more_body", False):
+            response_complete.set()
+
+    await tutorial_app(scope, receive, send)
+    return statuses[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 16, 128, 512])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        uploads.UPLOAD_DIR = directory
+        uploads.UPLOAD_MAX_FILE_SIZE = uploads.UPLOAD_MAX_REQUEST_SIZE = 2 * 1024**3
+        print(f"{'file MB':>8} {'status':>7} {'seconds':>8} {'peak RSS MB':>12}")
+        for size_mb in args.sizes_mb:
+            start = time.perf_counter()
+            status = asyncio.run(upload(size_mb * 1024**2))
+            elapsed = time.perf_counter() - start
+            print(f"{size_mb:>8} {status:>7} {elapsed:>8.2f} {peak_rss_mb():>12.1f}")
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Drive a representative mix of tutorial_app routes at a fixed concurrency and report
+latency percentiles and throughput per route, either in-process through the ASGI
+interface or against a real uvicorn process.
+
+Results can be saved as a JSON baseline and later runs compared against it, exiting
+with an error when a route got slower than the allowed threshold.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/http_suite.py --target asgi
+    PYTHONPATH=./app python benchmarks/http_suite.py --target uvicorn --save-baseline
+    PYTHONPATH=./app python benchmarks/http_suite.py --baseline --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, "app")
+BASELINES_DIR = os.path.join(ROOT_DIR, "benchmarks", "baselines")
+
+OFFER = {
+    "name": "Offer",
+    "price": 100.0,
+    "items": [
+        {
+            "name": f"item {i}",
+            "price": float(i),
+            "image": {"url": f"https://example.com/{i}.png", "name": f"image {i}"},
+        }
+        for i in range(20)
+    ],
+}
+UPLOAD = b"x" * 64 * 1024
+
+Scenario = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+async def login_and_read_current_user(client: httpx.AsyncClient) -> httpx.Response:
+    response = await client.post(
+        "/token", data={"username": "johndoe", "password": "secret"}
+    )
+    token = response.json()["access_token"]
+    return await client.get(
+        "/current_user", headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "path_param": lambda client: client.get("/items/42"),
+    "query_params": lambda client: client.get(
+        "/users/1/items/foo",
+        params={"optional_str": "bar", "include_description": "true"},
+    ),
+    "cursor_page": lambda client: client.get("/items/", params={"limit": 2}),
+    "response_model": lambda client: client.get("/items/bar/public"),
+    "offer_body": lambda client: client.post("/offers/", json=OFFER),
+    "upload": lambda client: client.post(
+        "/file/", files={"file": ("upload.bin", UPLOAD)}
+    ),
+    "auth": login_and_read_current_user,
+    "background_task": lambda client: client.post(
+        "/send-notification/johndoe@example.com"
+    ),
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await scenario(client)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_suite(
+    client: httpx.AsyncClient, names: List[str], requests: int, concurrency: int
+) -> Dict[str, dict]:
+    results = {}
+    for name in names:
+        # Warm up caches, connections and lazily started services first
+        await run_scenario(client, SCENARIOS[name], concurrency, concurrency)
+        results[name] = await run_scenario(
+            client, SCENARIOS[name], requests, concurrency
+        )
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int, extra_args: List[str]) -> subprocess.Popen:
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:tutorial_app",
+            "--app-dir",
+            APP_DIR,
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+            *extra_args,
+        ],
+        cwd=APP_DIR,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start in time")
+
+
+async def benchmark(args) -> Dict[str, dict]:
+    names = args.routes or list(SCENARIOS)
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    if args.target == "asgi":
+        # Imported here so that the uvicorn target measures a clean server process
+        from main import tutorial_app  # pylint: disable=import-outside-toplevel
+
+        async with httpx.AsyncClient(
+            app=tutorial_app, base_url="http://testserver", limits=limits
+        ) as client:
+            return await run_suite(client, names, args.requests, args.concurrency)
+
+    port = free_port()
+    process = start_uvicorn(port, args.uvicorn_args)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits
+        ) as client:
+            return await run_suite(client, names, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float):
+    """
+    Return the regressions of `results` against `baseline`: routes whose p95 latency
+    grew, or whose throughput dropped, by more than `threshold` (0.2 = 20%).
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms"
+            )
+        if result["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {previous['rps']:.0f} -> {result['rps']:.0f} req/s"
+            )
+    return regressions
+
+
+def print_results(results: Dict[str, dict]):
+    print(
+        f"{'route':<16} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        f" {'errors':>7}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<16} {result['rps']:>9.0f} {result['p50_ms']:>8.2f}"
+            f" {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            f" {result['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--routes", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument(
+        "--uvicorn-args",
+        nargs=argparse.REMAINDER,
+        default=[],
+        help="extra arguments for the uvicorn process, e.g. --workers 4",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const="",
+        help="save results as the baseline (default benchmarks/baselines/<target>.json)",
+    )
+    parser.add_argument(
+        "--baseline",
+        nargs="?",
+        const="",
+        help="compare results with a baseline (default benchmarks/baselines/<target>.json)",
+    )
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+    default_baseline = os.path.join(BASELINES_DIR, f"{args.target}.json")
+
+    results = asyncio.run(benchmark(args))
+    print_results(results)
+
+    if args.save_baseline is not None:
+        path = args.save_baseline or default_baseline
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode="w") as baseline_file:
+            json.dump(
+                {
+                    "target": args.target,
+                    "concurrency": args.concurrency,
+                    "python": platform.python_version(),
+                    "routes": results,
+                },
+                baseline_file,
+                indent=2,
+            )
+        print(f"Baseline saved to {path}")
+
+    if args.baseline is not None:
+        path = args.baseline or default_baseline
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline["routes"], args.threshold)
+        if regressions:
+            print(f"Regressions over {args.threshold:.0%} against {path}:")
+            print("\n".join(f"  {regression}" for regression in regressions))
+            sys.exit(1)
+        print(f"No regression over {args.threshold:.0%} against {path}")
+
+
+if __name__ == "__main__":
+    main()
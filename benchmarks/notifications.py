@@ -0,0 +1,64 @@
+"""
+Compare the batched NotificationWriter with opening the log file once per
+notification, as write_notification used to do.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/notifications.py
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from tasks import NotificationWriter
+
+
+def write_notification_per_call(path: str, email: str, message=""):
+    with open(path, mode="a") as email_file:
+        email_file.write(f"notification for {email}: {message}\n")
+
+
+async def per_call(path: str, count: int):
+    loop = asyncio.get_event_loop()
+    # BackgroundTasks runs sync functions in the threadpool, one call each
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                None, write_notification_per_call, path, f"user{i}@example.com", "hi"
+            )
+            for i in range(count)
+        )
+    )
+
+
+async def batched(path: str, count: int):
+    writer = NotificationWriter(path)
+    await writer.start()
+    await asyncio.gather(
+        *(writer.write(f"user{i}@example.com", "hi") for i in range(count))
+    )
+    await writer.stop()
+
+
+def run(name: str, func, count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "log.txt")
+        start = time.perf_counter()
+        asyncio.run(func(path, count))
+        elapsed = time.perf_counter() - start
+        with open(path) as log_file:
+            lines = sum(1 for _ in log_file)
+    print(f"{name:>10}: {count / elapsed:>12,.0f} notifications/s ({lines} lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+    run("per-call", per_call, args.count)
+    run("batched", batched, args.count)
+
+
+if __name__ == "__main__":
+    main()
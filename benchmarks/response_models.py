@@ -0,0 +1,86 @@
+"""
+Time FastAPI's response model handling (validation + jsonable_encoder) against the
+serializers CompiledResponseRoute compiles, for each tutorial_app route with a
+response model, rendering both with FastJSONResponse.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/response_models.py
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.routing import APIRoute, serialize_response
+
+from main import tutorial_app
+from models import Pet, SQLUser, UserIn
+from responses import FastJSONResponse
+from serializers import compile_serializer
+
+SAMPLES = {
+    "/items_response_model_exclude_unset/{item_id}": {"name": "Foo", "price": 50.2},
+    "/items/{item_id}/name": {"name": "Bar", "price": 3.2, "tax": 20.2},
+    "/items/{item_id}/public": {"name": "Baz", "price": 4.2, "tax": 10.5},
+    "/user_with_limited_response_model/": UserIn(username="john", password="x"),
+    "/user_in_fake_db/": UserIn(username="john", password="x"),
+    "/sql_users/{user_id}": SQLUser(id=1, email="john@example.com"),
+    "/pets/": Pet(type="cat", name="Tom"),
+    "/pets_docstring/": Pet(type="cat", name="Tom"),
+}
+
+
+def route_options(route: APIRoute) -> dict:
+    return {
+        "include": route.response_model_include,
+        "exclude": route.response_model_exclude,
+        "by_alias": route.response_model_by_alias,
+        "exclude_unset": route.response_model_exclude_unset,
+        "exclude_defaults": route.response_model_exclude_defaults,
+        "exclude_none": route.response_model_exclude_none,
+    }
+
+
+def per_call_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    args = parser.parse_args()
+    loop = asyncio.new_event_loop()
+
+    print(f"{'route':<48} {'fastapi us':>10} {'compiled us':>11} {'speedup':>8}")
+    for route in tutorial_app.routes:
+        sample = SAMPLES.get(getattr(route, "path", None))
+        if sample is None or route.response_model is None:
+            continue
+        options = route_options(route)
+        serializer = compile_serializer(route.response_model, **options)
+
+        def default():
+            content = loop.run_until_complete(
+                serialize_response(
+                    field=route.secure_cloned_response_field,
+                    response_content=sample,
+                    **options,
+                )
+            )
+            return FastJSONResponse(content)
+
+        def compiled():
+            return FastJSONResponse(serializer(sample))
+
+        default_us = per_call_us(default, args.repeat)
+        compiled_us = per_call_us(compiled, args.repeat)
+        print(
+            f"{route.path:<48} {default_us:>10.2f} {compiled_us:>11.2f}"
+            f" {default_us / compiled_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Time rendering large Offer and List[Image] payloads with the stdlib JSONResponse
+after jsonable_encoder, as before, and with FastJSONResponse.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/serialization.py
+"""
+import argparse
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models import Image, ItemWithNestedModel, Offer
+from responses import FastJSONResponse
+
+
+def make_images(count: int):
+    return [
+        Image(url=f"https://example.com/images/{i}.png", name=f"image {i}")
+        for i in range(count)
+    ]
+
+
+def make_offer(count: int):
+    return Offer(
+        name="Big offer",
+        price=1000.0,
+        items=[
+            ItemWithNestedModel(name=f"item {i}", price=float(i), tax=0.2, image=image)
+            for i, image in enumerate(make_images(count))
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    payloads = {"Offer": make_offer(args.count), "List[Image]": make_images(args.count)}
+    print(f"{'payload':>12} {'stdlib ms':>10} {'orjson ms':>10}")
+    for name, payload in payloads.items():
+        stdlib = timeit.timeit(
+            lambda: JSONResponse(jsonable_encoder(payload)), number=args.repeat
+        )
+        fast = timeit.timeit(lambda: FastJSONResponse(payload), number=args.repeat)
+        print(
+            f"{name:>12} {stdlib / args.repeat * 1000:>10.2f}"
+            f" {fast / args.repeat * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare offset and keyset pagination of SQLUser on a local SQLite stand-in.
+
+Run with:
+    PYTHONPATH=./app python benchmarks/users_pagination.py
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import SQLUser, get_users, get_users_after
+
+
+def seed(session, rows: int):
+    session.execute(
+        SQLUser.__table__.insert(),
+        [
+            {"email": f"user{i}@example.com", "hashed_password": "fakehashed"}
+            for i in range(1, rows + 1)
+        ],
+    )
+    session.commit()
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    seed(session, args.page_size * args.pages)
+
+    print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+    for page in (1, args.pages // 100, args.pages // 10, args.pages):
+        skip = (page - 1) * args.page_size
+        # The id of the last row on the previous page, as a client would have it
+        after_id = skip or None
+        offset_ms = timed(lambda: get_users(session, skip, args.page_size), args.repeat)
+        keyset_ms = timed(
+            lambda: get_users_after(session, after_id, args.page_size), args.repeat
+        )
+        print(f"{page:>8} {offset_ms:>10.3f} {keyset_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from cache import MISSING, TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    cache.set("token", "user")
+    cache.set("invalid", None, ttl=1)
+
+    timer.now = 5
+    assert cache.get("token") == "user"
+    assert cache.get("invalid") is MISSING
+
+    timer.now = 10
+    assert cache.get("token") is MISSING
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
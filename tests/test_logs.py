@@ -0,0 +1,39 @@
+import io
+import json
+import logging
+
+from logs import JSONFormatter, SamplingFilter, start_logging, stop_logging, Truncated
+
+
+def make_record(msg="Request validation failed", level=logging.WARNING, **extra):
+    record = logging.makeLogRecord({"name": "main", "msg": msg, "levelno": level})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_lines_truncate_large_fields():
+    record = make_record(path="/offers/", body=Truncated({"name": "x" * 100}, 20))
+
+    line = json.loads(JSONFormatter().format(record))
+
+    assert line["message"] == "Request validation failed"
+    assert line["path"] == "/offers/"
+    assert line["body"] == '{"name":"xxxxxxxxxxx...[truncated 91 bytes]'
+
+
+def test_repetitive_errors_are_sampled():
+    sampling = SamplingFilter(burst=2, sample_every=5)
+
+    passed = [sampling.filter(make_record()) for _ in range(12)]
+
+    assert passed == [True, True] + [False] * 4 + [True] + [False] * 4 + [True]
+    assert sampling.filter(make_record("Another error"))
+
+
+def test_records_are_written_by_the_listener():
+    stream = io.StringIO()
+    start_logging(stream=stream)
+    logging.getLogger("main").warning("Unicorn exception", extra={"unicorn": "yolo"})
+    stop_logging()
+
+    assert json.loads(stream.getvalue())["unicorn"] == "yolo"
@@ -1,6 +1,15 @@
+import hashlib
+import json
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
 
+from database import Base, get_db, make_engine
+import main
+import uploads
 from main import tutorial_app
+from models import fake_users_db, get_user, SQLUser
 
 client = TestClient(tutorial_app)
 
@@ -14,3 +23,243 @@ def test_read_items():
         {"item_name": "Bar"},
         {"item_name": "Baz"},
     ]
+
+
+def test_read_items_with_cursor():
+    first_page = client.get("/items", params={"limit": 2})
+    assert first_page.json() == [{"item_name": "Foo"}, {"item_name": "Bar"}]
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = client.get("/items", params={"limit": 2, "cursor": cursor})
+    assert second_page.json() == [{"item_name": "Baz"}]
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+def test_read_items_with_depends_ordered_by_index():
+    response = client.get(
+        "/items_with_depends/", params={"order_by": "price", "limit": 2}
+    )
+    assert response.json()["items"] == [{"item_name": "Bar"}, {"item_name": "Baz"}]
+
+    response = client.get(
+        "/items_with_depends/",
+        params={"order_by": "price", "cursor": response.json()["next_cursor"]},
+    )
+    assert response.json() == {"items": [{"item_name": "Foo"}]}
+
+
+def test_read_items_with_invalid_cursor():
+    response = client.get("/items", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def sql_db(tmp_path):
+    engine = make_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    TestingSessionLocal = sessionmaker(bind=engine)
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                SQLUser(email=f"user{i}@example.com", hashed_password="x")
+                for i in range(3)
+            ]
+        )
+        db.commit()
+
+    def get_test_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    tutorial_app.dependency_overrides[get_db] = get_test_db
+    yield
+    tutorial_app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def test_read_sql_users_with_keyset_pagination(sql_db):
+    response = client.get("/sql_users/", params={"limit": 2})
+    assert [user["id"] for user in response.json()] == [1, 2]
+
+    after_id = response.headers["X-Next-After-Id"]
+    response = client.get("/sql_users/", params={"after_id": after_id, "limit": 2})
+    assert response.json() == [{"id": 3, "email": "user2@example.com"}]
+
+
+def test_read_sql_user_by_email(sql_db):
+    response = client.get("/sql_users/by_email/user1@example.com")
+    assert response.json() == {"id": 2, "email": "user1@example.com"}
+    assert client.get("/sql_users/by_email/nobody@example.com").status_code == 404
+
+
+def test_db_pool_metrics_release_connections(sql_db):
+    client.get("/sql_users/1")
+    metrics = client.get("/db/pool_metrics").json()
+    assert metrics["checkouts"] >= 1
+    assert metrics["in_use"] == 0
+
+
+def test_read_current_user_is_cached_until_disabled(monkeypatch):
+    decoded_tokens = []
+
+    def counting_decode_token(token):
+        decoded_tokens.append(token)
+        return get_user(fake_users_db, token)
+
+    monkeypatch.setitem(
+        fake_users_db, "janedoe", {**fake_users_db["johndoe"], "username": "janedoe"}
+    )
+    monkeypatch.setattr(main, "fake_decode_token", counting_decode_token)
+    headers = {"Authorization": "Bearer janedoe"}
+
+    assert client.get("/current_user", headers=headers).status_code == 200
+    assert client.get("/current_user", headers=headers).status_code == 200
+    assert decoded_tokens == ["janedoe"]
+
+    main.disable_user("janedoe")
+    assert client.get("/current_user", headers=headers).status_code == 400
+    assert decoded_tokens == ["janedoe", "janedoe"]
+    main.identity_cache.pop("janedoe")
+
+
+def test_invalid_token_is_negatively_cached():
+    headers = {"Authorization": "Bearer nobody"}
+    assert client.get("/current_user", headers=headers).status_code == 401
+    assert main.identity_cache.get("nobody") is None
+
+
+def test_send_notification_appends_to_log(tmp_path, monkeypatch):
+    log_path = tmp_path / "log.txt"
+    monkeypatch.setattr(main.notification_writer, "path", str(log_path))
+
+    with TestClient(tutorial_app) as app_client:
+        app_client.post("/send-notification/foo@example.com")
+        app_client.post("/send-notification/bar@example.com")
+
+    assert log_path.read_text().splitlines() == [
+        "notification for foo@example.com: some notification",
+        "notification for bar@example.com: some notification",
+    ]
+
+
+def test_create_files_streams_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    files = [("files", ("a.txt", b"hello")), ("files", ("b.txt", b"world!"))]
+
+    response = client.post("/files/", files=files)
+
+    assert response.json() == {
+        "file_sizes": [5, 6],
+        "sha256s": [
+            hashlib.sha256(b"hello").hexdigest(),
+            hashlib.sha256(b"world!").hexdigest(),
+        ],
+    }
+    assert sorted(path.read_bytes() for path in tmp_path.iterdir()) == [
+        b"hello",
+        b"world!",
+    ]
+
+
+def test_create_file_over_size_limit_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(uploads, "UPLOAD_MAX_FILE_SIZE", 4)
+
+    response = client.post("/file/", files={"file": ("a.txt", b"hello")})
+
+    assert response.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cached_item_route_answers_conditional_get_with_304():
+    response = client.get("/items/bar/public")
+    assert response.json() == {
+        "name": "Bar",
+        "description": "The bartenders",
+        "price": 3.2,
+    }
+    etag = response.headers["ETag"]
+
+    response = client.get("/items/bar/public", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_update_item_invalidates_cached_responses():
+    client.put("/items/7", json={"name": "Seven", "price": 7.0})
+    first = client.get("/items/7/name")
+    assert first.json() == {"name": "Seven"}
+
+    client.put("/items/7", json={"name": "Lucky Seven", "price": 7.0})
+    second = client.get(
+        "/items/7/name", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert second.status_code == 200
+    assert second.json() == {"name": "Lucky Seven"}
+    main.item_store.delete("7")
+    main.response_cache.invalidate(item_id="7")
+
+
+def test_update_item_with_datetime_is_serialized_natively():
+    response = client.put(
+        "/item_with_datetime/1",
+        json={"title": "Foo", "timestamp": "2022-04-10T12:30:00+00:00"},
+    )
+    assert response.json() == {
+        "title": "Foo",
+        "timestamp": "2022-04-10T12:30:00+00:00",
+        "description": None,
+    }
+
+
+def test_validation_error_echoes_body():
+    response = client.post("/items/", json={"name": "Foo", "price": "free"})
+    assert response.status_code == 422
+    assert response.json()["body"] == {"name": "Foo", "price": "free"}
+    assert response.json()["detail"][0]["loc"] == ["body", "price"]
+
+
+def test_create_multiple_images_echoes_images():
+    images = [{"url": "https://example.com/a.png", "name": "a"}]
+    response = client.post("/images/multiple/", json=images)
+    assert response.json() == images
+
+
+def test_process_time_header_and_route_metrics():
+    response = client.get("/users/timed-user")
+    assert float(response.headers["X-Process-Time"]) >= 0
+
+    metrics = client.get("/metrics").text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/users/{user_id}"}'
+        in metrics
+    )
+    assert (
+        'http_requests_total{method="GET",route="/users/{user_id}",status="200"}'
+        in metrics
+    )
+    assert "db_pool_connections_in_use" in metrics
+
+
+def test_create_items_bulk_streams_results_per_line():
+    body = b'{"name": "Foo", "price": 1.5}\n\n{"name": "Bar"}\nnot json\n{"name": "Baz", "price": 2}'
+
+    response = client.post(
+        "/items/bulk", data=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result.get("status") for result in results[:-1]] == [
+        "ok",
+        "error",
+        "error",
+        "ok",
+    ]
+    assert [result.get("line") for result in results[:-1]] == [1, 3, 4, 5]
+    assert results[1]["errors"][0]["loc"] == ["price"]
+    assert results[-1] == {"summary": {"ok": 2, "error": 2}}
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import SQLUser, get_users, get_users_after
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all(
+        [SQLUser(email=f"user{i}@example.com", hashed_password="x") for i in range(5)]
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_get_users_after_walks_all_pages(db):
+    first_page, after_id = get_users_after(db, limit=2)
+    assert [user.id for user in first_page] == [1, 2]
+    assert after_id == 2
+
+    second_page, after_id = get_users_after(db, after_id=after_id, limit=2)
+    assert [user.id for user in second_page] == [3, 4]
+
+    last_page, after_id = get_users_after(db, after_id=after_id, limit=2)
+    assert [user.id for user in last_page] == [5]
+    assert after_id is None
+
+
+def test_get_users_after_matches_offset_pagination(db):
+    keyset_page, _ = get_users_after(db, after_id=2, limit=2)
+    assert keyset_page == get_users(db, skip=2, limit=2)
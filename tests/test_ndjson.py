@@ -0,0 +1,23 @@
+import asyncio
+
+from ndjson import iter_lines
+
+
+async def collect(chunks, max_line_bytes):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [line async for line in iter_lines(stream(), max_line_bytes)]
+
+
+def test_lines_split_across_chunks_are_joined():
+    lines = asyncio.run(collect([b'{"a":', b" 1}\n{", b'"b": 2}'], 100))
+
+    assert lines == [(1, b'{"a": 1}', False), (2, b'{"b": 2}', False)]
+
+
+def test_too_long_lines_are_skipped_without_buffering():
+    lines = asyncio.run(collect([b"x" * 8, b"x" * 8, b"x\nok\n"], 10))
+
+    assert lines == [(1, b"", True), (2, b"ok", False)]
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import Item, Pet, UserIn, UserOut
+from serializers import compile_serializer
+
+CASES = [
+    (Item, {"name": "Foo", "price": 50.2}, {"exclude_unset": True}),
+    (Item, {"name": "Bar", "price": 3.2, "tax": 20.2}, {"include": {"name"}}),
+    (Item, {"name": "Baz", "price": 4.2, "tax": 10.5}, {"exclude": {"tax"}}),
+    (Item, Item(name="Foo", price="1.5"), {"exclude_none": True}),
+    (Pet, Pet(type="cat", name="Tom"), {}),
+    (UserOut, UserIn(username="john", password="secret"), {}),
+]
+
+
+@pytest.mark.parametrize("model, content, options", CASES)
+def test_compiled_serializer_matches_fastapi(model, content, options):
+    field = create_response_field(name="response", type_=model)
+    expected = asyncio.run(
+        serialize_response(field=field, response_content=content, **options)
+    )
+
+    assert compile_serializer(model, **options)(content) == expected
+
+
+def test_trusted_instances_are_not_revalidated(monkeypatch):
+    serializer = compile_serializer(Pet)
+    monkeypatch.setattr(
+        Pet, "validate", classmethod(lambda cls, value: pytest.fail("revalidated"))
+    )
+
+    assert serializer(Pet(type="dog", name="Rex")) == {"type": "dog", "name": "Rex"}
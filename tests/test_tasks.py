@@ -0,0 +1,40 @@
+import asyncio
+
+from tasks import NotificationWriter
+
+
+def test_notifications_are_appended_in_batches(tmp_path):
+    path = tmp_path / "log.txt"
+    path.write_text("notification for previous@example.com: kept\n")
+    writer = NotificationWriter(str(path), batch_size=2, flush_interval=0.01)
+
+    async def send():
+        await asyncio.gather(
+            *(writer.write(f"user{i}@example.com", "hi") for i in range(5))
+        )
+        await writer.stop()
+
+    asyncio.run(send())
+
+    lines = path.read_text().splitlines()
+    assert lines[0] == "notification for previous@example.com: kept"
+    assert sorted(lines[1:]) == [
+        f"notification for user{i}@example.com: hi" for i in range(5)
+    ]
+
+
+def test_full_queue_drops_newest_notifications(tmp_path):
+    writer = NotificationWriter(
+        str(tmp_path / "log.txt"), max_queue_size=2, overflow="drop_newest"
+    )
+
+    async def send():
+        await writer.start()
+        for i in range(5):
+            await writer.write(f"user{i}@example.com")
+        await writer.stop()
+
+    asyncio.run(send())
+
+    assert writer.dropped == 3
+    assert writer.written == 2